@@ -1,6 +1,6 @@
 import yaml
 from src.evaluation.fable_evaluator import FableEvaluator
-from src.utils.data_manager import DataManager
+from src.utils.data_manager import DataManager, YamlLoader
 
 def execute_evaluations(csv_path: str, yaml_path: str, num_fables: int = 20,
                                       evaluation_output: str = "evaluation_results.json",
@@ -22,25 +22,14 @@ def execute_evaluations(csv_path: str, yaml_path: str, num_fables: int = 20,
 
     # Read the updated YAML configuration.
     with open(yaml_path, 'r') as file:
-        config = yaml.safe_load(file)
+        config = yaml.load(file, Loader=YamlLoader)
     data = config.get("data", [])
 
     # Create an instance of the FableEvaluator.
     eval_service = FableEvaluator(yaml_path=yaml_path)
 
-    # Evaluate each fable individually.
-    for pair in data:
-        eval_service.run_evaluation(
-            evaluation_type="evaluation_prompt",
-            character=pair["character"],
-            trait=pair["trait"],
-            setting=pair["setting"],
-            conflict=pair["conflict"],
-            resolution=pair["resolution"],
-            moral=pair["moral"],
-            generated_fab=pair["generated_fab"],
-            output=evaluation_output
-        )
+    # Evaluate every fable individually, with the requests running concurrently.
+    eval_service.evaluate_fables(data, output=evaluation_output)
 
     # For diversity evaluation, load a subset of fables.
     fables_subset = data_manager.load_fables_from_yaml(num_fables)
@@ -1,3 +1,5 @@
+import asyncio
+
 from src.utils.ai.evaluator import GptEvaluator
 from src.utils.data_manager import DataManager
 
@@ -33,35 +35,100 @@ class FableEvaluator:
         """
         print("Evaluating the model's fable...")
 
-        evaluation_result = self.evaluator.evaluate(
-            character=character,
-            trait=trait,
-            setting=setting,
-            conflict=conflict,
-            resolution=resolution,
-            moral=moral,
-            generated_fab=generated_fab
-        )
+        fable = {
+            "character": character,
+            "trait": trait,
+            "setting": setting,
+            "conflict": conflict,
+            "resolution": resolution,
+            "moral": moral,
+            "generated_fab": generated_fab
+        }
+        evaluation_result = self.evaluator.evaluate(**fable)
+
+        entry = self._build_entry(fable, evaluation_result)
+        if entry:
+            DataManager.save_to_json(entry, output, append=True)
+
+    def evaluate_fables(self, fables: list[dict], output: str = "evaluation_results.json",
+                        max_concurrency: int = 16, save_every: int = 10):
+        """
+        Evaluates many fables concurrently, appending results to a JSON file in chunks as they complete.
+
+        Args:
+            fables (list[dict]): Fables with character, trait, setting, conflict, resolution,
+                                 moral and generated_fab keys.
+            output (str, optional): Output file for the evaluation results.
+            max_concurrency (int, optional): Maximum number of evaluation requests in flight.
+            save_every (int, optional): Number of completed results to collect before each append.
+        """
+        print(f"Evaluating {len(fables)} fables...")
+        asyncio.run(self._evaluate_all(fables, output, max_concurrency, save_every))
+
+    async def _evaluate_all(self, fables: list[dict], output: str, max_concurrency: int, save_every: int):
+        """
+        Sends evaluation requests for all fables, keeping at most `max_concurrency` in flight.
+        Entries are appended to `output` every `save_every` results, in completion order, so a
+        failure partway through keeps the progress made so far.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def bounded_evaluate(client, fable):
+            async with semaphore:
+                evaluation_result = await self.evaluator.evaluate_async(
+                    client,
+                    character=fable["character"],
+                    trait=fable["trait"],
+                    setting=fable["setting"],
+                    conflict=fable["conflict"],
+                    resolution=fable["resolution"],
+                    moral=fable["moral"],
+                    generated_fab=fable["generated_fab"]
+                )
+            return fable, evaluation_result
 
+        entries = []
+        # The client's connection pool belongs to this event loop, so it lives only as long as the run
+        async with self.evaluator.create_async_client() as client:
+            try:
+                for completed in asyncio.as_completed([bounded_evaluate(client, fable) for fable in fables]):
+                    fable, evaluation_result = await completed
+                    entry = self._build_entry(fable, evaluation_result)
+                    if entry:
+                        entries.append(entry)
+                    if len(entries) >= save_every:
+                        DataManager.save_to_json(entries, output, append=True)
+                        entries = []
+            finally:
+                if entries:
+                    DataManager.save_to_json(entries, output, append=True)
+
+    def _build_entry(self, fable: dict, evaluation_result):
+        """
+        Parses an evaluator response into a result entry for the given fable.
+
+        Returns:
+            dict or None: The entry to save, or None if the response could not be used.
+        """
         if not evaluation_result:
             print("No evaluation result received.")
-            return
+            return None
 
         evaluation_data = DataManager.extract_json_from_response(evaluation_result)
         additional_comments = DataManager.extract_additional_comments(evaluation_result)
 
         if not evaluation_data:
             print("Failed to extract JSON from the evaluation result.")
-            return
+            return None
 
-        entry = {
-            "character": character,
-            "trait": trait,
-            "setting": setting,
-            "conflict": conflict,
-            "resolution": resolution,
-            "moral": moral,
-            "generated_fable": generated_fab,
+        return {
+            "character": fable["character"],
+            "trait": fable["trait"],
+            "setting": fable["setting"],
+            "conflict": fable["conflict"],
+            "resolution": fable["resolution"],
+            "moral": fable["moral"],
+            "generated_fable": fable["generated_fab"],
             "grammar": evaluation_data.get("Grammar", "n/a"),
             "creativity": evaluation_data.get("Creativity", "n/a"),
             "consistency": evaluation_data.get("Consistency", "n/a"),
@@ -69,8 +136,6 @@ class FableEvaluator:
             "comments": additional_comments
         }
 
-        DataManager.append_to_json_file(output, entry)
-
     def evaluate_diversity(self, fables, diversity_output: str = "diversity_evaluation.csv"):
         """
         Runs a diversity evaluation on a list of fables and saves the result.
@@ -1,19 +1,22 @@
 import yaml
 import csv
 import json
-from itertools import product
+import math
 import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from src.utils.ai.generator import GenerativeAICore
+from src.utils.combinations import FEATURE_KEYS, decode_combination
 from src.utils.config.environment import EnvConfig
-from src.utils.data_manager import DataManager
+from src.utils.data_manager import DataManager, YamlLoader
 
 class FableGenerator:        
-    def __init__(self, model="Llama-3.1-8B-Instruct", config_path="src/generation/config.yml", output_file="src/artifacts/fables_with_meta.csv", num_fables=100):
+    def __init__(self, model="Llama-3.1-8B-Instruct", config_path="src/generation/config.yml", output_file="src/artifacts/fables_with_meta.csv", num_fables=100, max_workers=8):
         self.__model = model
         self.__config_path = config_path
         self.__output_file = output_file
         self.__num_fables = num_fables
+        self.__max_workers = max_workers
 
         # Load Yaml Config
         self.config = self._load_config()
@@ -29,35 +32,31 @@ class FableGenerator:
             raise ValueError(f"Model '{self.__model}' not found in ai_models.yaml")
         
         self.__hf_token = env_config.hf_token
-    
-    def _load_config(self):
-        """Loads the configuration from the YAML file."""
-        with open(self.__config_path, "r") as file:
-            return yaml.safe_load(file)    
 
-    def generate_fable_combinations(self):
-        """Generates and shuffles fable combinations based on the config."""
-        characters = self.config["characters"]
-        traits = self.config["traits"]
-        settings = self.config["settings"]
-        conflicts = self.config["conflicts"]
-        resolutions = self.config["resolutions"]
-        morals = self.config["morals"]
-
-        fable_combinations = list(product(characters, traits, settings, conflicts, resolutions, morals))
-        random.shuffle(fable_combinations)
-        return fable_combinations[:self.__num_fables]
-    
-    def generate_fable(self, character, trait, setting, conflict, resolution, moral):
-        ai_generator = GenerativeAICore(
+        # One generator (and HTTP client) shared by every fable in the run
+        self.__ai_generator = GenerativeAICore(
             system_prompt=self.__system_prompt,
             fable_prompt=self.__fable_prompt,
             endpoint_url=self.__hf_endpoint_url,
             api_key=self.__hf_token,
             model=self.__model
         )
+    
+    def _load_config(self):
+        """Loads the configuration from the YAML file."""
+        with open(self.__config_path, "r") as file:
+            return yaml.load(file, Loader=YamlLoader)
+
+    def generate_fable_combinations(self):
+        """Samples unique fable combinations from the config without materializing their Cartesian product."""
+        features = [self.config[key] for key in FEATURE_KEYS]
+        total = math.prod(len(values) for values in features)
 
-        return ai_generator.generate_fable(
+        indices = random.sample(range(total), min(self.__num_fables, total))
+        return [decode_combination(index, features) for index in indices]
+
+    def generate_fable(self, character, trait, setting, conflict, resolution, moral):
+        return self.__ai_generator.generate_fable(
             character=character,
             trait=trait,
             setting=setting,
@@ -66,25 +65,29 @@ class FableGenerator:
             moral=moral
         )
 
-    def create_fables_with_meta(self, selected_combos):
-        """Generates fables with metadata for the given combinations."""
-        meta_rows = []
-        for (character, trait, setting, conflict, resolution, moral) in selected_combos:
-            max_attempts = 3  # Maximum number of attempts to generate a fable
-            attempt = 0
+    def generate_fable_with_retries(self, combo, max_attempts=3):
+        """Generates a fable for one combination, retrying on failure. Returns None if all attempts fail."""
+        for attempt in range(max_attempts):
+            try:
+                return self.generate_fable(*combo)
+            except Exception as e:
+                print(f"Attempt {attempt + 1} failed: {e}")
 
-            while attempt < max_attempts:
-                try:
-                    row = self.generate_fable(character, trait, setting, conflict, resolution, moral)
-                    meta_rows.append(row)
-                    break  # If successful, break out of the retry loop
-                except Exception as e:
-                    print(f"Attempt {attempt + 1} failed: {e}")
-                    attempt += 1
+        print(f"Failed to generate fable after {max_attempts} attempts for combo: {combo}")
+        return None
 
-            if attempt == max_attempts:
-                print(f"Failed to generate fable after {max_attempts} attempts for combo: {(character, trait, setting, conflict, resolution, moral)}")
-        return meta_rows
+    def create_fables_with_meta(self, selected_combos):
+        """Generates fables with metadata for the given combinations, yielding each one as it completes."""
+        executor = ThreadPoolExecutor(max_workers=self.__max_workers)
+        try:
+            futures = [executor.submit(self.generate_fable_with_retries, combo) for combo in selected_combos]
+            for future in as_completed(futures):
+                row = future.result()
+                if row is not None:
+                    yield row
+        finally:
+            # If the consumer stops early, drop queued requests instead of running them for nothing
+            executor.shutdown(wait=False, cancel_futures=True)
 
     def run(self):
         """Runs the fable generation process."""
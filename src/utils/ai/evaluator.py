@@ -1,6 +1,7 @@
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 import yaml
 from src.utils.config.environment import EnvConfig
+from src.utils.data_manager import YamlLoader
 
 
 class GptEvaluator:
@@ -12,14 +13,15 @@ class GptEvaluator:
         # Load YAML configuration
         try:
             with open(yaml_path, 'r') as file:
-                self.__config = yaml.safe_load(file)
+                self.__config = yaml.load(file, Loader=YamlLoader)
         except Exception as e:
             print(f"Error loading YAML file: {e}")
 
         # Initialize the OpenAI client after the key is loaded
         environment = EnvConfig()
 
-        self.__client = OpenAI(api_key=environment.openai_api_key)
+        self.__api_key = environment.openai_api_key
+        self.__client = OpenAI(api_key=self.__api_key)
         self.__gpt_model = gpt_model
 
         # Load System Prompt
@@ -28,12 +30,10 @@ class GptEvaluator:
         if system_prompt:
             self.__system_prompt = system_prompt
 
-    def evaluate(self, character, trait, setting, conflict, resolution, moral, generated_fab):
+    def _build_evaluation_messages(self, character, trait, setting, conflict, resolution, moral, generated_fab):
         """
-        Use GPT-4 to evaluate a fable based on structured input and its generated fable.
+        Formats the evaluation prompt from YAML into chat messages for a single fable.
         """
-
-        # Load the evaluation prompt from YAML and format it
         evaluation_prompt = self.__config['prompts']['evaluation_prompt'].format(
             character=character,
             trait=trait,
@@ -44,13 +44,45 @@ class GptEvaluator:
             generated_fab=generated_fab
         )
 
+        return [
+            {"role": "system", "content": self.__system_prompt},
+            {"role": "user", "content": evaluation_prompt}
+        ]
+
+    def evaluate(self, character, trait, setting, conflict, resolution, moral, generated_fab):
+        """
+        Use GPT-4 to evaluate a fable based on structured input and its generated fable.
+        """
+        messages = self._build_evaluation_messages(character, trait, setting, conflict, resolution, moral, generated_fab)
+
         try:
             response = self.__client.chat.completions.create(
                 model=self.__gpt_model,
-                messages=[
-                    {"role": "system", "content": self.__system_prompt},
-                    {"role": "user", "content": evaluation_prompt}
-                ]
+                messages=messages
+            )
+            return response.choices[0].message.content
+        except Exception as e:
+            print(f"Error while generating and evaluating fable: {e}")
+            return None
+
+    def create_async_client(self):
+        """
+        Creates an AsyncOpenAI client for `evaluate_async`. Its connection pool is bound to the
+        running event loop, so create one per loop: `async with evaluator.create_async_client() as client:`.
+        """
+        return AsyncOpenAI(api_key=self.__api_key)
+
+    async def evaluate_async(self, client, character, trait, setting, conflict, resolution, moral, generated_fab):
+        """
+        Asynchronous variant of `evaluate`, allowing many fables to be evaluated concurrently
+        through `client`, an AsyncOpenAI client from `create_async_client`.
+        """
+        messages = self._build_evaluation_messages(character, trait, setting, conflict, resolution, moral, generated_fab)
+
+        try:
+            response = await client.chat.completions.create(
+                model=self.__gpt_model,
+                messages=messages
             )
             return response.choices[0].message.content
         except Exception as e:
@@ -66,13 +66,12 @@ class GenerativeAICore:
         pipeline_version = "1.0.0"
 
         start_time = time.time()
-        logger.info("Sending request to Hugging Face OpenAI-compatible completions endpoint.")
+        logger.debug("Sending request to Hugging Face OpenAI-compatible completions endpoint.")
 
         # The model name must match what your endpoint expects.
-        completion_stream = self.client.completions.create(
+        completion = self.client.completions.create(
             model=self.model,
             prompt=prompt_text,
-            stream=True,  # Stream the text in chunks
             temperature=None,
             top_p=None,
             frequency_penalty=None,
@@ -80,15 +79,8 @@ class GenerativeAICore:
             stop=None
         )
 
-        # Collect the streamed chunks
-        generated_chunks = []
-        for chunk in completion_stream:
-            # For completions, the streamed text usually appears in chunk.choices[0].text
-            part = chunk.choices[0].text
-            generated_chunks.append(part)
-
-        # Combine chunks into the final text
-        generated_text = "".join(generated_chunks)
+        # Only the final text is used, so read it from a single response
+        generated_text = completion.choices[0].text
         end_time = time.time()
         inference_time = end_time - start_time
 
@@ -0,0 +1,24 @@
+"""Helpers for sampling fable feature combinations without materializing their Cartesian product."""
+
+# Feature lists in the generator configs, in combination order
+FEATURE_KEYS = ("characters", "traits", "settings", "conflicts", "resolutions", "morals")
+
+
+def decode_combination(index, feature_lists):
+    """
+    Returns the combination at a flat index of the features' Cartesian product.
+
+    Equivalent to `list(product(*feature_lists))[index]` without building the list.
+
+    Args:
+        index (int): Position in the Cartesian product.
+        feature_lists (list[list[str]]): Feature value lists, in product order.
+
+    Returns:
+        tuple[str, ...]: One value from each feature list.
+    """
+    combination = []
+    for values in reversed(feature_lists):
+        index, position = divmod(index, len(values))
+        combination.append(values[position])
+    return tuple(reversed(combination))
@@ -3,6 +3,13 @@ import os
 import re
 import yaml
 import csv
+from typing import Iterable
+
+# Prefer the libyaml-backed loader; fall back when PyYAML was built without it
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
 
 class DataManager:
     def __init__(self, csv_path=None, yaml_path=None):
@@ -49,7 +56,7 @@ class DataManager:
         fables = []
         for row in rows:
             try:
-                fable_config = yaml.safe_load(row["fable_config"])
+                fable_config = yaml.load(row["fable_config"], Loader=YamlLoader)
                 fables.append({
                     "character": fable_config["character"],
                     "trait": fable_config["trait"],
@@ -75,7 +82,7 @@ class DataManager:
             raise FileNotFoundError(f"YAML file '{self.yaml_path}' does not exist.")
 
         with open(self.yaml_path, "r", encoding="utf-8") as yaml_file:
-            config = yaml.safe_load(yaml_file) or {}
+            config = yaml.load(yaml_file, Loader=YamlLoader) or {}
 
         config.update(new_data)
 
@@ -200,12 +207,12 @@ class DataManager:
         self.save_to_json(entry, file_path, append=True)
 
     @staticmethod
-    def write_to_csv(data: list[dict], output_file: str, fieldnames: list[str]):
+    def write_to_csv(data: Iterable[dict], output_file: str, fieldnames: list[str]):
         """
-        Writes a list of dictionaries to a CSV file.
+        Writes dictionaries to a CSV file, flushing each row as soon as it is written.
 
         Args:
-            data (list[dict]): List of dictionaries to write.
+            data (Iterable[dict]): Dictionaries to write; may be a lazily produced stream.
             output_file (str): Path to the CSV output file.
             fieldnames (list[str]): List of column names for the CSV file.
         """
@@ -213,7 +220,9 @@ class DataManager:
             with open(output_file, mode="w", newline="", encoding="utf-8") as file:
                 writer = csv.DictWriter(file, fieldnames=fieldnames)
                 writer.writeheader()
-                writer.writerows(data)
+                for row in data:
+                    writer.writerow(row)
+                    file.flush()
             print(f"CSV data successfully saved to {output_file}")
         except Exception as e:
             print(f"Error writing to CSV file '{output_file}': {e}")
@@ -224,7 +233,7 @@ class DataManager:
         Writes the generated fables with metadata to a CSV file.
 
         Args:
-            meta_rows (list[dict]): List of fables with metadata.
+            meta_rows (Iterable[dict]): Fables with metadata; rows are written as they arrive.
             output_file (str): Path to the CSV output file.
         """
         fieldnames = [
@@ -235,12 +244,14 @@ class DataManager:
             "generation_datetime", "pipeline_version"
         ]
 
-        # Convert `fable_config` from dict to JSON string format for CSV storage
-        for row in meta_rows:
-            if isinstance(row.get("fable_config"), dict):
-                row["fable_config"] = json.dumps(row["fable_config"])
+        def serialized_rows():
+            # Convert `fable_config` from dict to JSON string format for CSV storage
+            for row in meta_rows:
+                if isinstance(row.get("fable_config"), dict):
+                    row["fable_config"] = json.dumps(row["fable_config"])
+                yield row
 
-        DataManager.write_to_csv(meta_rows, output_file, fieldnames)
+        DataManager.write_to_csv(serialized_rows(), output_file, fieldnames)
 
     @staticmethod
     def read_json_file(filename: str) -> dict | None:
@@ -257,7 +268,7 @@ class DataManager:
         """Reads the YAML file containing AI model configurations."""
         try:
             with open(file_path, 'r') as file:
-                return yaml.safe_load(file)
+                return yaml.load(file, Loader=YamlLoader)
         except Exception as e:
             print(f"Error reading YAML file '{file_path}': {e}")
             return None
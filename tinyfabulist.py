@@ -2,19 +2,45 @@ import yaml
 from pybars import Compiler
 from itertools import product
 import logging
-from typing import List, Tuple, Dict, Any, Iterator
+from logging.handlers import QueueHandler, QueueListener
+import atexit
+import queue
+from typing import List, Tuple, Dict, Any, Iterator, Iterable, Optional
 from random import sample
+from math import prod
 from decouple import config
 import argparse
 import json
 import sys
-from openai import OpenAI
+from openai import OpenAI, DefaultHttpxClient
+import httpx
 import csv
+import threading
+from functools import lru_cache
+
+from src.utils.combinations import FEATURE_KEYS, decode_combination
+from src.utils.data_manager import YamlLoader
+
+# Prefer orjson for the JSONL hot paths; fall back to the standard library
+try:
+    from orjson import dumps as json_dumps, loads as json_loads
+except ImportError:
+    def json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    json_loads = json.loads
 
 # Constants
 CONFIG_FILE = 'tinyfabulist.yaml'
 LOG_FILE = 'tinyfabulist.log'
 LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+DEFAULT_WORKERS = 16
+PIPELINE_QUEUE_SIZE = 64
+MAX_CONNECTIONS = 64
+# Generation settings shared by every backend; max tokens counts new tokens only
+MAX_NEW_TOKENS = 1000
+TEMPERATURE = 0.7
+# Template variable filled by each entry of FEATURE_KEYS
+CONTEXT_KEYS = ('character', 'trait', 'setting', 'conflict', 'resolution', 'moral')
 
 class TinyFabulistError(Exception):
     """Base exception for TinyFabulist errors"""
@@ -27,24 +53,44 @@ class ConfigError(TinyFabulistError):
 def setup_logging() -> logging.Logger:
     """Configure logging for the application
     
+    Records are queued and written to the console and log file by a
+    background listener, so worker threads never block on log I/O. Calling
+    it again once the queue is installed leaves the configuration unchanged.
+    
     Returns:
         logging.Logger: Configured logger instance
     """
-    logging.basicConfig(
-        level=logging.INFO,
-        format=LOG_FORMAT,
-        handlers=[
-            logging.StreamHandler(),
-            logging.FileHandler(LOG_FILE)
-        ]
-    )
+    root_logger = logging.getLogger()
+    if any(isinstance(handler, QueueHandler) for handler in root_logger.handlers):
+        return logging.getLogger(__name__)
+    
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [
+        logging.StreamHandler(),
+        logging.FileHandler(LOG_FILE)
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)  # Drain pending records on exit
+    
+    root_logger.setLevel(logging.INFO)
+    root_logger.addHandler(QueueHandler(log_queue))
     return logging.getLogger(__name__)
 
-logger = setup_logging()
+# Handlers are installed by setup_logging() in main(), so importing this module has no side effects
+logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=None)
 def load_settings() -> Dict[str, Any]:
     """Load settings from YAML file
     
+    The file is read and parsed once per process; later calls return the
+    cached dictionary. Call ``load_settings.cache_clear()`` to reload it.
+    
     Returns:
         Dict[str, Any]: Configuration dictionary
         
@@ -53,7 +99,7 @@ def load_settings() -> Dict[str, Any]:
     """
     try:
         with open(CONFIG_FILE, 'r') as file:
-            settings = yaml.safe_load(file)
+            settings = yaml.load(file, Loader=YamlLoader)
             logger.info("Settings loaded successfully")
             return settings
     except FileNotFoundError:
@@ -114,62 +160,53 @@ def generate_prompts(config: Dict[str, Any], count: int = 10, randomize: bool =
         randomize: Whether to randomize the selection
     """
     features = config['generator']['features']
-    prompts = []
-    used_combinations = set()  # Track combinations to avoid duplicates
+    feature_lists = [features[key] for key in FEATURE_KEYS]
     
-    compiler = Compiler()
     # Fix: access templates from generator.prompt
-    system_template = compiler.compile(config['generator']['prompt']['system'])
-    generator_template = compiler.compile(config['generator']['prompt']['fable'])
+    system_template = compile_template(config['generator']['prompt']['system'])
+    generator_template = compile_template(config['generator']['prompt']['fable'])
     system_prompt = system_template({})
     
-    while len(prompts) < count:
-        if randomize:
-            # Randomly select one item from each feature list
-            combination = (
-                sample(features['characters'], 1)[0],
-                sample(features['traits'], 1)[0],
-                sample(features['settings'], 1)[0],
-                sample(features['conflicts'], 1)[0],
-                sample(features['resolutions'], 1)[0],
-                sample(features['morals'], 1)[0]
-            )
-            
-            # Only add if this combination hasn't been used
-            if combination not in used_combinations:
-                used_combinations.add(combination)
-                char, trait, setting, conflict, resolution, moral = combination
-                context = {
-                    'character': char,
-                    'trait': trait,
-                    'setting': setting,
-                    'conflict': conflict,
-                    'resolution': resolution,
-                    'moral': moral
-                }
-                prompts.append(generator_template(context))
-        else:
-            # Non-random sequential selection
-            idx = len(prompts)
-            char = features['characters'][idx % len(features['characters'])]
-            trait = features['traits'][idx % len(features['traits'])]
-            setting = features['settings'][idx % len(features['settings'])]
-            conflict = features['conflicts'][idx % len(features['conflicts'])]
-            resolution = features['resolutions'][idx % len(features['resolutions'])]
-            moral = features['morals'][idx % len(features['morals'])]
-            
-            context = {
-                'trait': trait,
-                'character': char,
-                'setting': setting,
-                'conflict': conflict,
-                'resolution': resolution,
-                'moral': moral
-            }
-            prompts.append(generator_template(context))
+    if randomize:
+        # Sample distinct positions in the Cartesian product and decode only
+        # those, never asking for more unique combinations than exist
+        total = prod(len(values) for values in feature_lists)
+        indices = sample(range(total), min(count, total))
+        combinations = [decode_combination(index, feature_lists) for index in indices]
+    else:
+        # Non-random sequential selection
+        combinations = [
+            tuple(values[idx % len(values)] for values in feature_lists)
+            for idx in range(count)
+        ]
+    
+    prompts = [
+        generator_template(dict(zip(CONTEXT_KEYS, combination)))
+        for combination in combinations
+    ]
     
     return system_prompt, prompts
 
+def positive_int(value: str) -> int:
+    """Parse a command line value that must be an integer of at least 1
+    
+    Args:
+        value: The raw argument value
+        
+    Returns:
+        int: The parsed value
+        
+    Raises:
+        argparse.ArgumentTypeError: If the value is not a positive integer
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
 def parse_args() -> argparse.Namespace:
     """Parse command line arguments
     
@@ -189,6 +226,14 @@ def parse_args() -> argparse.Namespace:
                       help='Number of prompts to generate (default: 100)')
     parser.add_argument('--models', nargs='+',
                       help='Specify models to use')
+    parser.add_argument('--backend', choices=['tgi', 'vllm'], default='tgi',
+                      help='Inference backend: remote TGI endpoints or local vLLM (default: tgi); '
+                           'vllm loads one model per run, so pass a single --models entry unless '
+                           'only one model is configured')
+    parser.add_argument('--quantization', choices=['bitsandbytes', 'fp8'],
+                      help='Quantize model weights when loading them with the vllm backend')
+    parser.add_argument('--workers', type=positive_int, default=DEFAULT_WORKERS,
+                      help=f'Maximum concurrent requests to TGI endpoints (default: {DEFAULT_WORKERS})')
     return parser.parse_args()
 
 def read_prompts(filename: str) -> Iterator[Dict[str, Any]]:
@@ -201,10 +246,10 @@ def read_prompts(filename: str) -> Iterator[Dict[str, Any]]:
         Dict[str, Any]: Prompt data
     """
     try:
-        with open(filename, 'r') as f:
+        with open(filename, 'rb') as f:
             for line in f:
                 if line.strip():  # Skip empty lines
-                    prompt_list = json.loads(line)
+                    prompt_list = json_loads(line)
                     for prompt in prompt_list:  # Each line contains a list of prompts
                         yield prompt
     except FileNotFoundError:
@@ -214,21 +259,51 @@ def read_prompts(filename: str) -> Iterator[Dict[str, Any]]:
         logger.error(f"Error parsing JSONL file: {e}")
         raise ConfigError(f"Invalid JSONL format: {e}")
 
+# OpenAI clients keyed by base_url, shared across worker threads
+_CLIENTS: Dict[str, OpenAI] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+def get_client(base_url: str) -> OpenAI:
+    """Return the shared OpenAI client for an endpoint, creating it on first use
+    
+    Reusing one client per endpoint keeps its connection pool alive across
+    requests instead of opening a new session for every fable.
+    
+    Args:
+        base_url: The endpoint base URL
+        
+    Returns:
+        OpenAI: Client bound to the endpoint
+    """
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(base_url)
+        if client is None:
+            client = OpenAI(
+                base_url=base_url,
+                api_key=config('HF_ACCESS_TOKEN'),
+                http_client=DefaultHttpxClient(
+                    limits=httpx.Limits(
+                        max_connections=MAX_CONNECTIONS,
+                        max_keepalive_connections=MAX_CONNECTIONS
+                    )
+                )
+            )
+            _CLIENTS[base_url] = client
+        return client
+
 def generate_fable(system_prompt: str, fable_prompt: str, base_url: str) -> str:
     """Generate a fable using OpenAI
     
     Args:
         system_prompt: The system prompt
         fable_prompt: The fable prompt
+        base_url: The endpoint base URL
         
     Returns:
         str: Generated fable
     """
     try:
-        client = OpenAI(
-            base_url=base_url,
-            api_key=config('HF_ACCESS_TOKEN')
-        )
+        client = get_client(base_url)
         
         chat_completion = client.chat.completions.create(
             model="tgi",
@@ -236,25 +311,158 @@ def generate_fable(system_prompt: str, fable_prompt: str, base_url: str) -> str:
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": fable_prompt}
             ],
-            max_tokens=1000,
-            temperature=0.7,
-            stream=True
+            max_tokens=MAX_NEW_TOKENS,
+            temperature=TEMPERATURE
         )
-
-        fable_text = ""
-        for message in chat_completion:
-            if message.choices[0].delta.content is not None:
-                fable_text += message.choices[0].delta.content
-        return fable_text
+        return chat_completion.choices[0].message.content or ""
     except Exception as e:
         logger.error(f"OpenAI API error: {e}")
         return f"Error generating fable: {e}"
 
-def write_fables(fables: List[Dict[str, str]], output_format: str = 'text') -> None:
-    """Write generated fables to stdout
+def generate_fables_vllm(system_prompt: str, fable_prompts: List[str], hf_id: str,
+                         quantization: Optional[str] = None) -> List[str]:
+    """Generate fables locally with vLLM
+    
+    All prompts are submitted in a single call so that vLLM's continuous
+    batching can schedule them together and share the KV cache. Prefix
+    caching is enabled, so the system prompt every conversation starts with
+    is prefilled once and its KV blocks are reused across the batch.
+    
+    Args:
+        system_prompt: The system prompt
+        fable_prompts: The fable prompts
+        hf_id: Hugging Face model id to load
+        quantization: Optional vLLM weight quantization method, e.g. 'bitsandbytes'
+            for 4-bit NF4 weights; None loads the checkpoint's own dtype
+        
+    Returns:
+        List[str]: Generated fables, in the same order as the prompts
+        
+    Raises:
+        ConfigError: If vLLM is not installed
+    """
+    try:
+        from vllm import LLM, SamplingParams
+    except ImportError:
+        raise ConfigError("The vllm backend requires the 'vllm' package to be installed")
+    
+    llm_kwargs = {}
+    if quantization == 'bitsandbytes':
+        # vLLM releases without automatic load-format selection need this alongside the quantization
+        llm_kwargs['load_format'] = 'bitsandbytes'
+    llm = LLM(model=hf_id, dtype='auto', quantization=quantization, enable_prefix_caching=True, **llm_kwargs)
+    sampling_params = SamplingParams(temperature=TEMPERATURE, max_tokens=MAX_NEW_TOKENS)
+    conversations = [
+        [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+        for prompt in fable_prompts
+    ]
+    outputs = llm.chat(conversations, sampling_params)
+    return [output.outputs[0].text for output in outputs]
+
+def stream_fables_vllm(system_prompt: str, fable_prompts: List[str],
+                       model_config: Dict[str, Any],
+                       quantization: Optional[str] = None) -> Iterator[Dict[str, str]]:
+    """Generate fables with vLLM for a single model, yielding them once its batch completes
     
     Args:
-        fables: List of fable data including model, prompt and generated text
+        system_prompt: The system prompt
+        fable_prompts: The fable prompts
+        model_config: Configuration of the model to load
+        quantization: Optional vLLM weight quantization method
+        
+    Yields:
+        Dict[str, str]: Fable data including model, prompt and generated text
+    """
+    logger.info(f"Generating fables using model: {model_config['name']}")
+    fables = generate_fables_vllm(system_prompt, fable_prompts, model_config['hf_id'], quantization)
+    for prompt, fable in zip(fable_prompts, fables):
+        yield {
+            'model': model_config['name'],
+            'prompt': prompt,
+            'fable': fable
+        }
+
+def stream_fables_tgi(system_prompt: str, fable_prompts: List[str],
+                      model_configs: List[Dict[str, Any]], workers: int) -> Iterator[Dict[str, str]]:
+    """Generate fables on TGI endpoints through a producer/consumer pipeline
+    
+    A producer thread queues (model, prompt) requests, ``workers`` threads
+    send them to the endpoints, and each finished fable is yielded to the
+    caller - the writer stage - as soon as it arrives. Bounded queues keep
+    the stages in step, so serialization overlaps with network waits.
+    
+    Args:
+        system_prompt: The system prompt
+        fable_prompts: The fable prompts
+        model_configs: Configurations of the models to use
+        workers: Maximum number of concurrent requests
+        
+    Yields:
+        Dict[str, str]: Fable data including model, prompt and generated text
+        
+    Raises:
+        Exception: The first error raised in the producer or a worker thread
+    """
+    request_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    result_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    
+    def produce() -> None:
+        try:
+            for model_config in model_configs:
+                logger.info(f"Generating fables using model: {model_config['name']}")
+                for prompt in fable_prompts:
+                    request_queue.put((model_config, prompt))
+        except Exception as e:
+            result_queue.put(e)  # Re-raised by the writer stage
+        finally:
+            for _ in range(workers):
+                request_queue.put(None)  # One end-of-stream sentinel per worker
+    
+    def work() -> None:
+        try:
+            while (request := request_queue.get()) is not None:
+                model_config, prompt = request
+                fable = generate_fable(
+                    system_prompt=system_prompt,
+                    fable_prompt=prompt,
+                    base_url=model_config['base_url']  # Pass the base_url from model config
+                )
+                result_queue.put({
+                    'model': model_config['name'],
+                    'prompt': prompt,
+                    'fable': fable
+                })
+        except Exception as e:
+            result_queue.put(e)  # Re-raised by the writer stage
+        finally:
+            result_queue.put(None)  # Tell the writer this worker is done
+    
+    threads = [threading.Thread(target=produce, daemon=True)]
+    threads += [threading.Thread(target=work, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    
+    finished_workers = 0
+    while finished_workers < workers:
+        fable = result_queue.get()
+        if fable is None:
+            finished_workers += 1
+            continue
+        if isinstance(fable, Exception):
+            raise fable
+        yield fable
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Generated fable for prompt: %s...", fable['prompt'][:50])
+
+def write_fables(fables: Iterable[Dict[str, str]], output_format: str = 'text') -> None:
+    """Write generated fables to stdout as they arrive
+    
+    Args:
+        fables: Fable data including model, prompt and generated text; may be
+            a stream, in which case each fable is written as soon as it is produced
         output_format: Output format ('text', 'csv', or 'jsonl')
     """
     fields = ['model', 'prompt', 'fable']
@@ -262,18 +470,20 @@ def write_fables(fables: List[Dict[str, str]], output_format: str = 'text') -> N
     if output_format == 'csv':
         writer = csv.DictWriter(sys.stdout, fieldnames=fields)
         writer.writeheader()
-        writer.writerows(fables)
+        for fable in fables:
+            writer.writerow(fable)
+            sys.stdout.flush()
     elif output_format == 'jsonl':
         for fable in fables:
             output = {field: fable[field] for field in fields}
-            json.dump(output, sys.stdout)
-            sys.stdout.write('\n')
+            sys.stdout.buffer.write(json_dumps(output) + b'\n')
+            sys.stdout.buffer.flush()
     else:
         for fable in fables:
             print(f"\nModel: {fable['model']}")
             print(f"\nPrompt:\n{fable['prompt']}")
             print(f"\nFable:\n{fable['fable']}\n") 
-            print("-" * 80)
+            print("-" * 80, flush=True)
 
 def write_output(system_prompt: str, fable_templates: List[str], output_format: str) -> None:
     """Write output in the specified format
@@ -286,7 +496,7 @@ def write_output(system_prompt: str, fable_templates: List[str], output_format:
     if output_format == 'jsonl':        
         # Write each fable template and system prompt
         for template in fable_templates:
-            json.dump([
+            sys.stdout.buffer.write(json_dumps([
                 {
                     'prompt_type': 'system_prompt',
                     'content': system_prompt
@@ -295,8 +505,7 @@ def write_output(system_prompt: str, fable_templates: List[str], output_format:
                     'prompt_type': 'generator_prompt',
                     'content': template
                 }
-            ], sys.stdout)
-            sys.stdout.write('\n')
+            ]) + b'\n')
     else:
         print("System prompt:", system_prompt)
         print("\nFable templates:")
@@ -305,6 +514,7 @@ def write_output(system_prompt: str, fable_templates: List[str], output_format:
 
 def main() -> None:
     """Main entry point for the script"""
+    setup_logging()
     args = parse_args()
     
     try:
@@ -332,33 +542,37 @@ def main() -> None:
             if invalid_models:
                 raise ConfigError(f"Invalid models: {', '.join(invalid_models)}")
             
-            # Read and process prompts
+            # Read and process prompts. Every request reuses this exact system
+            # prompt string, so servers with prefix caching prefill it once per model.
             prompts = list(read_prompts(args.generate_fables))
             system_prompt = next(p['content'] for p in prompts 
                                if p['prompt_type'] == 'system_prompt')
             fable_prompts = [p['content'] for p in prompts 
                            if p['prompt_type'] == 'generator_prompt']
             
-            # Generate fables for each model
-            all_fables = []
-            for model_name in models_to_use:
-                model_config = available_models[model_name]
-                logger.info(f"Generating fables using model: {model_config['name']}")
-                
-                for prompt in fable_prompts:
-                    fable = generate_fable(
-                        system_prompt=system_prompt,
-                        fable_prompt=prompt,
-                        base_url=model_config['base_url']  # Pass the base_url from model config
+            # Generate fables for each model, writing each one as it arrives
+            if args.backend == 'vllm':
+                # Each vLLM engine reserves most of the GPU and is not reliably
+                # released in-process, so load a single model per run
+                if len(models_to_use) != 1:
+                    raise ConfigError(
+                        "The vllm backend loads one model per run; choose one with --models "
+                        f"(configured: {', '.join(available_models)})"
                     )
-                    all_fables.append({
-                        'model': model_config['name'],
-                        'prompt': prompt,
-                        'fable': fable
-                    })
-                    logger.info(f"Generated fable for prompt: {prompt[:50]}...")
+                model_name = models_to_use[0]
+                if 'hf_id' not in available_models[model_name]:
+                    raise ConfigError(f"Model '{model_name}' has no 'hf_id' configured for the vllm backend")
+                fables = stream_fables_vllm(system_prompt, fable_prompts, available_models[model_name], args.quantization)
+            else:
+                if args.quantization:
+                    raise ConfigError("--quantization is only supported with the vllm backend")
+                missing_urls = [m for m in models_to_use if 'base_url' not in available_models[m]]
+                if missing_urls:
+                    raise ConfigError(f"Models without 'base_url' for the tgi backend: {', '.join(missing_urls)}")
+                model_configs = [available_models[m] for m in models_to_use]
+                fables = stream_fables_tgi(system_prompt, fable_prompts, model_configs, args.workers)
             
-            write_fables(all_fables, args.output)
+            write_fables(fables, args.output)
         else:
             logger.error("No action specified. Use --generate-prompts or --generate-fables")
             sys.exit(1)